@@ -5,28 +5,149 @@ OUTPUT: CSV with columns: doi, species, abundance_or_biomass, number, location,
 """
 
 import os
-import requests
+import asyncio
+import httpx
+import hishel
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import time
 import argparse
 import csv
+import hashlib
+import logging
 import re
-import json
+import orjson
+from collections import Counter
+import ijson
 from typing import List, Dict, Any
+from aiolimiter import AsyncLimiter
+import ahocorasick
+import fitz  # PyMuPDF
 import PyPDF2
 import pdfplumber
+from pdfminer.pdfparser import PDFSyntaxError
+
+logger = logging.getLogger(__name__)
+
+# Token-bucket rate limits per API host (replaces the old fixed 3s sleep)
+CLAUDE_LIMITER = AsyncLimiter(2, 1)   # 2 requests/second to api.anthropic.com
+SCOPUS_LIMITER = AsyncLimiter(5, 1)   # 5 requests/second to api.elsevier.com
+
+# Default number of papers processed concurrently (see --concurrency);
+# throughput is ultimately bounded by the API rate limits above
+DEFAULT_CONCURRENCY = 8
+
+# Papers batched into one Claude request (amortizes RTT and the
+# instruction prefix across documents)
+CLAUDE_BATCH_SIZE = 5
+
+# Per-paper text budget inside a batched prompt
+CLAUDE_TEXT_LIMIT = 8000
+
+# Papers with less text than this (title + stub abstract) are not worth
+# a Claude extraction call
+MIN_TEXT_CHARS = 500
+
+# Output CSV schema
+OUTPUT_COLUMNS = ['doi', 'species', 'abundance_or_biomass', 'number', 'location', 'distance_from_seed', 'title']
+
+# On-disk HTTP cache so seed reruns skip Scopus/Claude round-trips
+CACHE_DIR = ".crawl_cache"
+CACHE_TTL = 7 * 24 * 3600  # one week
+
+# Patterns used in the per-paper hot loop, compiled once at import
+_RE_FENCE_OPEN = re.compile(r'```(?:json)?\n')
+_RE_FENCE_CLOSE = re.compile(r'\n```')
+_RE_JSON_BLOCK = re.compile(r'(\[.*\]|\{.*\})', re.DOTALL)
+_RE_DOI = re.compile(r'(?:doi:?\s*|DOI:?\s*)([10]\.\d+/[^\s\]\),;]+)', re.IGNORECASE)
+_RE_WORDS = re.compile(r'\b[a-zA-Z]{4,}\b')
+
+_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'})
+
+# Journal banner lines ("PNAS 2023 Vol. 120 No. 10 e...", URLs, copyright
+# notices) that must not be mistaken for the paper title
+_RE_BANNER = re.compile(r'vol\.?\s*\d+|no\.?\s*\d+|©|\bwww\.|https?://|\be\d{6,}\b', re.IGNORECASE)
+
+# Static Claude instructions, built once at import; only {documents}
+# varies per call (the dict itself is still JSON-escaped by orjson,
+# which is what keeps arbitrary paper text safe in the payload)
+_PROMPT_TEMPLATE = """
+    Extract species information from each research paper below. Return ONLY a JSON object
+    keyed by paper id.
+
+    For each species in each study, extract:
+    - species: scientific name (Genus species)
+    - abundance_or_biomass: population data, density, biomass measurements
+    - number: specimen count or sample size
+    - location: study location or habitat
+
+    Return format:
+    {{
+      "0": [
+        {{
+          "species": "Genus species",
+          "abundance_or_biomass": "density/biomass data or not specified",
+          "number": "count or not specified",
+          "location": "location"
+        }}
+      ],
+      "1": []
+    }}
+
+    Papers:
+    {documents}
+    """
+
+# Cheap local filters for paragraphs likely to carry species data:
+# candidate binomial names and population/biomass vocabulary
+_RE_BINOMIAL = re.compile(r'\b[A-Z][a-z]{2,}\s+[a-z]{3,}\b')
+_RE_SPECIES_KW = re.compile(r'\b(abundance|biomass|density|ind(?:/|\s*per\s*)|g/m²|population|specimens?)\b', re.IGNORECASE)
+
+# Pages per worker task when parsing PDFs in parallel (amortizes the
+# cost of re-opening the PDF in each worker process)
+PDF_PAGE_BLOCK_SIZE = 8
+
+def _extract_page_block(pdf_path: str, page_numbers: List[int]) -> str:
+    """Extract text from a block of pages (runs in a worker process)"""
+    with pdfplumber.open(pdf_path, pages=page_numbers) as pdf:
+        text_parts = []
+        for page in pdf.pages:
+            text = page.extract_text()
+            if text:
+                text_parts.append(text)
+        return "\n".join(text_parts)
 
 def extract_pdf_text(pdf_path: str) -> str:
     """Extract text from PDF file"""
+    # Fast path: PyMuPDF wraps the MuPDF C engine and is an order of
+    # magnitude faster than pdfplumber's pure-Python layout analysis
+    try:
+        doc = fitz.open(pdf_path)
+        text = "\n".join(page.get_text("text") for page in doc)
+        doc.close()
+        # Fewer than 100 chars usually means a scanned PDF; let the
+        # slower parsers have a try at it
+        if len(text) >= 100:
+            return text
+    except (OSError, RuntimeError) as e:  # fitz errors subclass RuntimeError
+        logger.warning("PyMuPDF failed on %s: %s", pdf_path, e)
+
     try:
+        # Count pages, then fan page blocks out across worker processes
+        # (pdfplumber's layout analysis is CPU-bound and single-threaded)
         with pdfplumber.open(pdf_path) as pdf:
-            text_parts = []
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    text_parts.append(text)
-            return "\n".join(text_parts)
-    except:
+            num_pages = len(pdf.pages)
+
+        page_blocks = [
+            list(range(start + 1, min(start + PDF_PAGE_BLOCK_SIZE, num_pages) + 1))
+            for start in range(0, num_pages, PDF_PAGE_BLOCK_SIZE)
+        ]
+
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 4)) as executor:
+            block_texts = list(executor.map(_extract_page_block, [pdf_path] * len(page_blocks), page_blocks))
+
+        return "\n".join(text for text in block_texts if text)
+    except (OSError, ValueError, PDFSyntaxError) as e:
+        logger.warning("pdfplumber failed on %s: %s", pdf_path, e)
         try:
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
@@ -36,170 +157,221 @@ def extract_pdf_text(pdf_path: str) -> str:
                     if text:
                         text_parts.append(text)
                 return "\n".join(text_parts)
-        except:
+        except (OSError, PyPDF2.errors.PdfReadError) as e:
+            logger.warning("PyPDF2 failed on %s: %s", pdf_path, e)
             return ""
 
-def extract_species_from_text(text: str, doi: str, title: str, distance: int, claude_api_key: str) -> List[Dict]:
-    """Extract species data using Claude API"""
-    
+def extract_pdf_title(pdf_path: str) -> str:
+    """Best-effort paper title from the PDF metadata"""
+    try:
+        doc = fitz.open(pdf_path)
+        title = (doc.metadata or {}).get('title', '').strip()
+        doc.close()
+        if 20 <= len(title) <= 200:
+            return title
+    except (OSError, RuntimeError) as e:
+        logger.warning("No PDF metadata title in %s: %s", pdf_path, e)
+    return ""
+
+def _trim_text_for_prompt(text: str, limit: int = CLAUDE_TEXT_LIMIT) -> str:
+    """Keep only paragraphs likely to mention species, up to limit chars"""
+    kept = []
+    total = 0
+    for paragraph in text.split('\n\n'):
+        if _RE_BINOMIAL.search(paragraph) or _RE_SPECIES_KW.search(paragraph):
+            kept.append(paragraph)
+            total += len(paragraph) + 2
+            if total >= limit:
+                break
+
+    # Nothing matched (e.g. OCR noise): fall back to the raw head of the text
+    if not kept:
+        return text[:limit]
+    return '\n\n'.join(kept)[:limit]
+
+def _format_species_rows(items: List[Dict], paper: Dict) -> List[Dict]:
+    """Turn Claude's raw species items into output rows for one paper"""
+    rows = []
+    for item in items:
+        if isinstance(item, dict):
+            rows.append({
+                'doi': paper['doi'],
+                'species': str(item.get('species', 'UNSPECIFIED')).strip(),
+                'abundance_or_biomass': str(item.get('abundance_or_biomass', 'not specified')).strip(),
+                'number': str(item.get('number', 'not specified')).strip(),
+                'location': str(item.get('location', 'UNSPECIFIED')).strip(),
+                'distance_from_seed': paper['distance'],
+                'title': paper['title'].strip()
+            })
+    return rows
+
+async def extract_species_batch(client: httpx.AsyncClient, papers: List[Dict], claude_api_key: str) -> List[Dict]:
+    """Extract species data from a batch of papers with a single Claude call"""
+
     headers = {
         "x-api-key": claude_api_key,
         "content-type": "application/json",
         "anthropic-version": "2023-06-01"
     }
-    
-    prompt = f"""
-    Extract species information from this research paper. Return ONLY a JSON array.
 
-    For each species in the study, extract:
-    - species: scientific name (Genus species)
-    - abundance_or_biomass: population data, density, biomass measurements
-    - number: specimen count or sample size
-    - location: study location or habitat
+    documents = "\n\n".join(
+        f'<paper id="{i}" doi="{paper["doi"]}">\n{_trim_text_for_prompt(paper["text"])}\n</paper>'
+        for i, paper in enumerate(papers)
+    )
 
-    Return format:
-    [
-      {{
-        "species": "Genus species",
-        "abundance_or_biomass": "density/biomass data or not specified",
-        "number": "count or not specified", 
-        "location": "location"
-      }}
-    ]
+    prompt = _PROMPT_TEMPLATE.format(documents=documents)
 
-    Text: {text[:40000]}
-    """
-    
     payload = {
         "model": "claude-3-haiku-20240307",
-        "max_tokens": 2000,
+        "max_tokens": 4000,
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.0
     }
-    
+
     try:
-        response = requests.post(
-            "https://api.anthropic.com/v1/messages",
-            headers=headers,
-            json=payload, 
-            timeout=60
-        )
+        async with CLAUDE_LIMITER:
+            response = await client.post(
+                "https://api.anthropic.com/v1/messages",
+                headers=headers,
+                content=orjson.dumps(payload)
+            )
         response.raise_for_status()
-        
-        response_data = response.json()
+
+        response_data = orjson.loads(response.content)
         claude_response = response_data["content"][0]["text"]
-        
+
         # Parse JSON response
-        claude_response = re.sub(r'```(?:json)?\n', '', claude_response)
-        claude_response = re.sub(r'\n```', '', claude_response)
-        
-        json_match = re.search(r'(\[.*\]|\{.*\})', claude_response, re.DOTALL)
+        claude_response = _RE_FENCE_OPEN.sub('', claude_response)
+        claude_response = _RE_FENCE_CLOSE.sub('', claude_response)
+
+        json_match = _RE_JSON_BLOCK.search(claude_response)
         if json_match:
             json_text = json_match.group(1)
         else:
             json_text = claude_response
-        
-        result = json.loads(json_text)
-        if isinstance(result, dict):
-            result = [result]
-        
-        # Format results
+
+        result = orjson.loads(json_text)
+
+        # Fan results back out to their papers by id
         species_data = []
-        for item in result:
-            if isinstance(item, dict):
-                species_data.append({
-                    'doi': doi,
-                    'species': str(item.get('species', 'UNSPECIFIED')).strip(),
-                    'abundance_or_biomass': str(item.get('abundance_or_biomass', 'not specified')).strip(),
-                    'number': str(item.get('number', 'not specified')).strip(),
-                    'location': str(item.get('location', 'UNSPECIFIED')).strip(),
-                    'distance_from_seed': distance,
-                    'title': title.strip()
-                })
-        
+        if isinstance(result, dict):
+            for i, paper in enumerate(papers):
+                items = result.get(str(i), [])
+                if isinstance(items, dict):
+                    items = [items]
+                species_data.extend(_format_species_rows(items, paper))
+        elif isinstance(result, list) and len(papers) == 1:
+            # Claude sometimes answers a single-paper batch with a bare array
+            species_data.extend(_format_species_rows(result, papers[0]))
+
         return species_data
-        
-    except Exception as e:
+
+    except (httpx.HTTPError, orjson.JSONDecodeError, KeyError, IndexError) as e:
         print(f"    Error extracting species: {e}")
         return []
 
-def get_paper_references(doi: str, scopus_api_key: str) -> List[Dict]:
-    """Get references from Scopus"""
-    
+# DOI -> (scopus_id, abstract text) lookups already made this run
+# ("" means not found)
+_paper_lookup_cache: Dict[str, tuple] = {}
+
+async def lookup_paper(client: httpx.AsyncClient, doi: str, scopus_api_key: str) -> tuple:
+    """Resolve a DOI to its Scopus ID and abstract text with one search,
+    memoized for the run"""
+
+    if doi in _paper_lookup_cache:
+        return _paper_lookup_cache[doi]
+
     headers = {
         'X-ELS-APIKey': scopus_api_key,
         'Accept': 'application/json'
     }
-    
-    try:
-        # Find Scopus ID
-        response = requests.get(
+
+    async with SCOPUS_LIMITER:
+        response = await client.get(
             "https://api.elsevier.com/content/search/scopus",
             headers=headers,
             params={
                 'query': f'DOI("{doi}")',
                 'count': 1,
-                'field': 'dc:identifier'
-            },
-            timeout=30
+                'field': 'dc:identifier,dc:title,dc:description'
+            }
         )
-        response.raise_for_status()
-        
-        data = response.json()
-        entries = data.get('search-results', {}).get('entry', [])
-        if not entries:
-            return []
-        
-        scopus_id = entries[0].get('dc:identifier', '').replace('SCOPUS_ID:', '')
+    response.raise_for_status()
+
+    data = orjson.loads(response.content)
+    entries = data.get('search-results', {}).get('entry', [])
+
+    scopus_id = ""
+    text_parts = []
+    if entries and isinstance(entries[0], dict):
+        paper = entries[0]
+        scopus_id = paper.get('dc:identifier', '').replace('SCOPUS_ID:', '')
+
+        title = paper.get('dc:title', '')
+        if title:
+            text_parts.append(f"Title: {title}")
+
+        abstract = paper.get('dc:description', '')
+        if abstract:
+            text_parts.append(f"Abstract: {abstract}")
+
+    result = (scopus_id, "\n\n".join(text_parts))
+    _paper_lookup_cache[doi] = result
+    return result
+
+async def get_paper_references(client: httpx.AsyncClient, doi: str, scopus_api_key: str) -> List[Dict]:
+    """Get references from Scopus"""
+
+    headers = {
+        'X-ELS-APIKey': scopus_api_key,
+        'Accept': 'application/json'
+    }
+
+    try:
+        # Find Scopus ID
+        scopus_id, _ = await lookup_paper(client, doi, scopus_api_key)
         if not scopus_id:
             return []
-        
+
         print(f"    Found Scopus ID: {scopus_id}")
-        
+
         # Get references - simplified field list
-        refs_response = requests.get(
-            f"https://api.elsevier.com/content/abstract/scopus_id/{scopus_id}/references",
-            headers=headers,
-            params={
-                'count': 20
-            },
-            timeout=30
-        )
-        
+        async with SCOPUS_LIMITER:
+            refs_response = await client.get(
+                f"https://api.elsevier.com/content/abstract/scopus_id/{scopus_id}/references",
+                headers=headers,
+                params={
+                    'count': 20
+                }
+            )
+
         if refs_response.status_code == 400:
             print(f"    References endpoint failed, trying alternative approach...")
             return []
-        
+
         refs_response.raise_for_status()
-        
-        refs_data = refs_response.json()
-        
-        # Navigate the response structure
-        abstract_response = refs_data.get('abstract-retrieval-response', {})
-        references_section = abstract_response.get('references', {})
-        
-        if isinstance(references_section, dict):
-            references = references_section.get('reference', [])
-        else:
-            references = references_section
-        
-        if not isinstance(references, list):
-            references = [references] if references else []
-        
+
+        # Stream only the reference items instead of materializing the
+        # whole abstract-retrieval-response (payloads can be hundreds of KB)
+        references = list(ijson.items(refs_response.content, 'abstract-retrieval-response.references.reference.item'))
+        if not references:
+            # Scopus emits a bare object instead of an array for single references
+            references = list(ijson.items(refs_response.content, 'abstract-retrieval-response.references.reference'))
+
         # Process references with better error handling
         ref_papers = []
         for ref in references:
             try:
                 # Multiple ways to extract reference info
                 ref_info = ref.get('ref-info', {})
-                
+
                 # Try to get DOI
                 ref_doi = ""
                 if 'ref-publicationtitle' in ref_info:
                     pub_title_info = ref_info['ref-publicationtitle']
                     if isinstance(pub_title_info, dict):
                         ref_doi = pub_title_info.get('prism:doi', '')
-                
+
                 # Try to get title
                 ref_title = ""
                 if 'ref-title' in ref_info:
@@ -208,23 +380,23 @@ def get_paper_references(doi: str, scopus_api_key: str) -> List[Dict]:
                         ref_title = title_info.get('ref-titletext', '')
                     elif isinstance(title_info, str):
                         ref_title = title_info
-                
+
                 # Alternative title extraction
                 if not ref_title and 'ref-titletext' in ref_info:
                     ref_title = ref_info.get('ref-titletext', '')
-                
+
                 # Only add if we have both DOI and title
                 if ref_doi and ref_title and len(ref_title) > 10:
                     ref_papers.append({'doi': ref_doi, 'title': ref_title})
-                    
-            except Exception as e:
+
+            except (AttributeError, KeyError, TypeError):
                 # Skip problematic references
                 continue
-        
+
         print(f"    Successfully extracted {len(ref_papers)} references")
         return ref_papers[:10]  # Limit to 10 references
-        
-    except requests.exceptions.HTTPError as e:
+
+    except httpx.HTTPStatusError as e:
         if e.response.status_code == 400:
             print(f"    Bad request for references - paper may not have accessible references")
         elif e.response.status_code == 404:
@@ -232,125 +404,262 @@ def get_paper_references(doi: str, scopus_api_key: str) -> List[Dict]:
         else:
             print(f"    HTTP error getting references: {e}")
         return []
-    except Exception as e:
+    except (httpx.HTTPError, orjson.JSONDecodeError, ijson.common.JSONError) as e:
         print(f"    Error getting references: {e}")
         return []
 
-def search_papers_by_title(title: str, scopus_api_key: str, max_results: int = 10) -> List[Dict]:
+async def search_papers_by_title(client: httpx.AsyncClient, title: str, scopus_api_key: str, max_results: int = 10) -> List[Dict]:
     """Search Scopus by title to find related papers"""
-    
+
     headers = {
         'X-ELS-APIKey': scopus_api_key,
         'Accept': 'application/json'
     }
-    
+
     try:
         # Extract key terms from title
-        title_words = re.findall(r'\b[a-zA-Z]{4,}\b', title.lower())
-        # Remove common words
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-        key_words = [word for word in title_words if word not in stop_words][:3]
-        
+        title_words = _RE_WORDS.findall(title.lower())
+        # Pick the three most frequent distinct non-stop words; taking the
+        # first three can repeat a word and degenerate the Scopus query
+        term_counts = Counter(word for word in title_words if word not in _STOP_WORDS)
+        key_words = [word for word, _ in term_counts.most_common(3)]
+
         if not key_words:
             return []
-        
+
         # Search by key terms
         search_terms = ' AND '.join([f'TITLE-ABS-KEY("{word}")' for word in key_words])
-        
-        response = requests.get(
-            "https://api.elsevier.com/content/search/scopus",
-            headers=headers,
-            params={
-                'query': search_terms,
-                'count': max_results,
-                'sort': 'relevancy',
-                'field': 'dc:title,prism:doi'
-            },
-            timeout=30
-        )
+
+        async with SCOPUS_LIMITER:
+            response = await client.get(
+                "https://api.elsevier.com/content/search/scopus",
+                headers=headers,
+                params={
+                    'query': search_terms,
+                    'count': max_results,
+                    'sort': 'relevancy',
+                    'field': 'dc:title,prism:doi'
+                }
+            )
         response.raise_for_status()
-        
-        data = response.json()
-        papers = data.get('search-results', {}).get('entry', [])
-        
-        if not isinstance(papers, list):
-            papers = [papers] if papers else []
-        
+
+        papers = list(ijson.items(response.content, 'search-results.entry.item'))
+        if not papers:
+            papers = list(ijson.items(response.content, 'search-results.entry'))
+
         # Process papers
         related_papers = []
         for paper in papers:
+            # The non-array fallback yields the raw value when Scopus
+            # returns "entry": [] — skip anything that isn't an entry dict
+            if not isinstance(paper, dict):
+                continue
+
             paper_doi = paper.get('prism:doi', '')
             paper_title = paper.get('dc:title', '')
-            
+
             if paper_doi and paper_title:
                 related_papers.append({'doi': paper_doi, 'title': paper_title})
-        
+
         return related_papers
-        
-    except Exception as e:
+
+    except (httpx.HTTPError, ijson.common.JSONError) as e:
         print(f"    Error searching by title: {e}")
         return []
 
-def filter_papers_by_keywords(papers: List[Dict], keywords: List[str]) -> List[Dict]:
-    """Filter papers by keywords in title"""
+def build_keyword_automaton(keywords: List[str]):
+    """Build an Aho-Corasick automaton for multi-keyword title matching"""
     if not keywords:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword.lower(), keyword.lower())
+    automaton.make_automaton()
+    return automaton
+
+def filter_papers_by_keywords(papers: List[Dict], automaton) -> List[Dict]:
+    """Filter papers by keywords in title"""
+    if automaton is None:
         return papers
-    
-    filtered_papers = []
-    keywords_lower = [kw.lower() for kw in keywords]
-    
-    for paper in papers:
-        title = paper.get('title', '').lower()
-        if any(keyword in title for keyword in keywords_lower):
-            filtered_papers.append(paper)
-    
-    return filtered_papers
-
-def get_paper_text_from_scopus(doi: str, scopus_api_key: str) -> str:
+
+    # One O(|title|) DFA pass finds any keyword, instead of a substring
+    # scan per keyword
+    return [
+        paper for paper in papers
+        if next(automaton.iter(paper.get('title', '').lower()), None) is not None
+    ]
+
+async def get_paper_text_from_scopus(client: httpx.AsyncClient, doi: str, scopus_api_key: str) -> str:
     """Get paper abstract from Scopus"""
-    
-    headers = {
-        'X-ELS-APIKey': scopus_api_key,
-        'Accept': 'application/json'
-    }
-    
+
     try:
-        response = requests.get(
-            "https://api.elsevier.com/content/search/scopus",
-            headers=headers,
-            params={
-                'query': f'DOI("{doi}")',
-                'count': 1,
-                'field': 'dc:title,dc:description,dc:creator'
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-        
-        data = response.json()
-        entries = data.get('search-results', {}).get('entry', [])
-        if not entries:
-            return ""
-        
-        paper = entries[0]
-        text_parts = []
-        
-        title = paper.get('dc:title', '')
-        if title:
-            text_parts.append(f"Title: {title}")
-        
-        abstract = paper.get('dc:description', '')
-        if abstract:
-            text_parts.append(f"Abstract: {abstract}")
-        
-        return "\n\n".join(text_parts)
-        
-    except:
+        _, text = await lookup_paper(client, doi, scopus_api_key)
+        return text
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+        logger.warning("No Scopus text for %s: %s", doi, e)
         return ""
 
+async def process_paper(client: httpx.AsyncClient, paper: Dict, sem: asyncio.Semaphore,
+                        queue: asyncio.Queue, args, keywords: List[str], keyword_automaton,
+                        state: Dict, writer: csv.DictWriter, csv_file):
+    """Process one paper: extract species, then enqueue its references"""
+
+    current_doi = paper['doi']
+    current_distance = paper['distance']
+
+    # Skip if already processed or over budget (event loop is single-threaded,
+    # so checking and updating state before the first await is race-free)
+    if current_doi in state['processed_dois'] or state['papers_processed'] >= args.max_papers:
+        return
+
+    state['processed_dois'].add(current_doi)
+    state['papers_processed'] += 1
+    paper_number = state['papers_processed']
+
+    async with sem:
+        print(f"📄 Processing paper {paper_number}/{args.max_papers} (distance {current_distance}): {paper['title'][:50]}...")
+
+        # Skip Claude for stub texts and for abstracts already seen this
+        # crawl (Scopus returns identical blurbs for duplicate DOIs)
+        text_hash = hashlib.blake2b(paper['text'].encode('utf-8', 'ignore'), digest_size=16).digest()
+        if len(paper['text']) < MIN_TEXT_CHARS:
+            print(f"⏭️  Skipping extraction (only {len(paper['text'])} chars of text)")
+        elif text_hash in state['seen_text_hashes']:
+            print(f"⏭️  Skipping extraction (duplicate text)")
+        else:
+            state['seen_text_hashes'].add(text_hash)
+            # Batch papers for Claude; flush once a full batch is ready
+            state['claude_batch'].append(paper)
+            if len(state['claude_batch']) >= CLAUDE_BATCH_SIZE:
+                batch = state['claude_batch'][:CLAUDE_BATCH_SIZE]
+                del state['claude_batch'][:CLAUDE_BATCH_SIZE]
+                species_data = await extract_species_batch(client, batch, args.claude_key)
+                # Flush rows immediately so a crash keeps partial progress
+                writer.writerows(species_data)
+                csv_file.flush()
+                state['rows_written'] += len(species_data)
+                print(f"✅ Found {len(species_data)} species across {len(batch)} papers")
+
+        # Get references if we haven't reached max depth
+        if current_distance < args.max_depth:
+            print(f"🔍 Getting references from distance {current_distance} paper...")
+
+            references = []
+
+            # Try to get references using DOI
+            if current_doi != "SEED_PAPER":
+                references = await get_paper_references(client, current_doi, args.scopus_key)
+
+            # If no references found via DOI, try title search
+            if not references:
+                print(f"⚠️  No references via DOI, trying title search...")
+                references = await search_papers_by_title(client, paper['title'], args.scopus_key, 15)
+
+            print(f"✅ Found {len(references)} potential references")
+
+            # Filter by keywords if provided
+            if keywords and references:
+                filtered_refs = filter_papers_by_keywords(references, keyword_automaton)
+                print(f"🔍 Filtered to {len(filtered_refs)} papers matching keywords: {', '.join(keywords)}")
+                references = filtered_refs
+
+            # Add references to processing queue
+            refs_added = 0
+            for ref in references:
+                ref_doi = ref['doi']
+                ref_title = ref['title']
+
+                # Skip if already processed or in queue
+                if ref_doi not in state['processed_dois'] and ref_doi not in state['queued_dois']:
+                    # Stop adding if we have enough papers queued
+                    if len(state['queued_dois']) >= args.max_papers:
+                        break
+
+                    # Get reference text
+                    ref_text = await get_paper_text_from_scopus(client, ref_doi, args.scopus_key)
+                    if ref_text:
+                        ref_paper = {
+                            'doi': ref_doi,
+                            'title': ref_title,
+                            'text': ref_text,
+                            'distance': current_distance + 1
+                        }
+                        state['queued_dois'].add(ref_doi)
+                        queue.put_nowait(ref_paper)
+                        refs_added += 1
+                        print(f"📚 Added to queue (distance {current_distance + 1}): {ref_title[:50]}...")
+                    else:
+                        print(f"⚠️  No text available for: {ref_title[:50]}...")
+
+            print(f"✅ Added {refs_added} new references to queue")
+
+async def paper_worker(client: httpx.AsyncClient, queue: asyncio.Queue, sem: asyncio.Semaphore,
+                       args, keywords: List[str], keyword_automaton,
+                       state: Dict, writer: csv.DictWriter, csv_file):
+    """Consume papers from the queue until cancelled"""
+    while True:
+        paper = await queue.get()
+        try:
+            await process_paper(client, paper, sem, queue, args, keywords, keyword_automaton, state, writer, csv_file)
+        except Exception as e:
+            print(f"    Error processing paper: {e}")
+        finally:
+            queue.task_done()
+
+async def run_pipeline(seed_paper: Dict, args, keywords: List[str],
+                       writer: csv.DictWriter, csv_file) -> tuple:
+    """Run the crawl over a pooled async HTTP client"""
+
+    state = {
+        'processed_dois': set(),
+        'queued_dois': set(),
+        'papers_processed': 0,
+        'claude_batch': [],
+        'seen_text_hashes': set(),
+        'rows_written': 0
+    }
+    keyword_automaton = build_keyword_automaton(keywords)
+
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=40)
+    # Retry failed connection attempts at the transport (the equivalent of
+    # requests' HTTPAdapter(max_retries=...) for the pooled client)
+    transport = httpx.AsyncHTTPTransport(limits=limits, retries=3, http2=True)
+    # force_cache ignores the APIs' no-store headers; Claude POSTs are keyed
+    # on the request body, so a changed prompt still invalidates the entry
+    storage = hishel.AsyncFileStorage(base_path=CACHE_DIR, ttl=CACHE_TTL)
+    controller = hishel.Controller(cacheable_methods=["GET", "POST"], force_cache=True)
+    async with hishel.AsyncCacheClient(storage=storage, controller=controller,
+                                       transport=transport, timeout=60) as client:
+        queue = asyncio.Queue()
+        queue.put_nowait(seed_paper)
+        state['queued_dois'].add(seed_paper['doi'])
+
+        sem = asyncio.Semaphore(args.concurrency)
+        workers = [
+            asyncio.create_task(paper_worker(client, queue, sem, args, keywords, keyword_automaton, state, writer, csv_file))
+            for _ in range(args.concurrency)
+        ]
+
+        # Wait until every queued paper (including enqueued references) is done
+        await queue.join()
+
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        # Flush the final partial batch
+        if state['claude_batch']:
+            species_data = await extract_species_batch(client, state['claude_batch'], args.claude_key)
+            writer.writerows(species_data)
+            csv_file.flush()
+            state['rows_written'] += len(species_data)
+            print(f"✅ Found {len(species_data)} species across {len(state['claude_batch'])} papers")
+
+    return state['rows_written'], state['papers_processed']
+
 def main():
     parser = argparse.ArgumentParser(description='Simple reference-based species extraction')
-    
+
     parser.add_argument('--seed-paper', '-s', type=str, required=True, help='Seed PDF paper path')
     parser.add_argument('--output', '-o', type=str, required=True, help='Output CSV file')
     parser.add_argument('--claude-key', '-ck', type=str, required=True, help='Claude API key')
@@ -358,12 +667,14 @@ def main():
     parser.add_argument('--max-papers', '-mp', type=int, default=20, help='Max papers to process')
     parser.add_argument('--max-depth', '-md', type=int, default=2, help='Max reference depth (1=refs, 2=refs of refs)')
     parser.add_argument('--keywords', '-kw', type=str, default='', help='Keywords to filter references (comma-separated)')
-    
+    parser.add_argument('--stats', action='store_true', help='Print species/distance summary statistics')
+    parser.add_argument('--concurrency', '-c', type=int, default=DEFAULT_CONCURRENCY, help='Papers processed concurrently')
+
     args = parser.parse_args()
-    
+
     # Parse keywords
     keywords = [kw.strip() for kw in args.keywords.split(',') if kw.strip()] if args.keywords else []
-    
+
     print(f"🔬 Simple Reference-Based Species Extraction")
     print(f"📄 Seed paper: {args.seed_paper}")
     print(f"📤 Output: {args.output}")
@@ -372,150 +683,65 @@ def main():
     if keywords:
         print(f"🔍 Keywords filter: {', '.join(keywords)}")
     print("=" * 50)
-    
-    all_species_data = []
-    processed_dois = set()
-    papers_to_process = []
-    
+
     # Process seed paper
     print(f"📄 Processing seed paper...")
     seed_text = extract_pdf_text(args.seed_paper)
     if not seed_text:
         print("❌ Could not extract text from seed paper")
         return
-    
-    # Extract DOI and title
-    doi_match = re.search(r'(?:doi:?\s*|DOI:?\s*)([10]\.\d+/[^\s\]\),;]+)', seed_text, re.IGNORECASE)
+
+    # Extract DOI and title; both live on the first page, so only scan the
+    # head of the text instead of regex-searching/splitting the whole paper
+    doi_match = _RE_DOI.search(seed_text, 0, 5000)
     seed_doi = doi_match.group(1) if doi_match else "SEED_PAPER"
-    
-    lines = seed_text.split('\n')
-    seed_title = ""
-    for line in lines[:15]:
-        line = line.strip()
-        if 20 <= len(line) <= 200 and not any(x in line.lower() for x in ['doi:', 'page', 'journal', 'research article']):
-            seed_title = line
-            break
+
+    # Prefer the PDF metadata title: with PyMuPDF the first text lines are
+    # often the journal page banner, not the article title
+    seed_title = extract_pdf_title(args.seed_paper)
+    if not seed_title:
+        lines = seed_text[:5000].split('\n')
+        for line in lines[:15]:
+            line = ''.join(ch for ch in line if ch.isprintable()).strip()
+            if (20 <= len(line) <= 200
+                    and not any(x in line.lower() for x in ['doi:', 'page', 'journal', 'research article', 'pnas'])
+                    and not _RE_BANNER.search(line)):
+                seed_title = line
+                break
     if not seed_title:
         seed_title = "Seed Paper"
-    
+
     print(f"✅ Extracted seed paper text ({len(seed_text)} chars)")
     print(f"📍 DOI: {seed_doi}")
     print(f"📝 Title: {seed_title}")
-    
-    # Add seed paper to processing list
-    papers_to_process.append({
+
+    seed_paper = {
         'doi': seed_doi,
         'title': seed_title,
         'text': seed_text,
         'distance': 0
-    })
-    
-    papers_processed = 0
-    
-    # Process papers queue (seed + references)
-    while papers_to_process and papers_processed < args.max_papers:
-        current_paper = papers_to_process.pop(0)
-        current_doi = current_paper['doi']
-        current_distance = current_paper['distance']
-        
-        # Skip if already processed
-        if current_doi in processed_dois:
-            continue
-            
-        processed_dois.add(current_doi)
-        papers_processed += 1
-        
-        print(f"📄 Processing paper {papers_processed}/{args.max_papers} (distance {current_distance}): {current_paper['title'][:50]}...")
-        
-        # Extract species from current paper
-        species_data = extract_species_from_text(
-            current_paper['text'], 
-            current_doi, 
-            current_paper['title'], 
-            current_distance, 
-            args.claude_key
-        )
-        all_species_data.extend(species_data)
-        print(f"✅ Found {len(species_data)} species")
-        
-        # Get references if we haven't reached max depth
-        if current_distance < args.max_depth:
-            print(f"🔍 Getting references from distance {current_distance} paper...")
-            
-            references = []
-            
-            # Try to get references using DOI
-            if current_doi != "SEED_PAPER":
-                references = get_paper_references(current_doi, args.scopus_key)
-            
-            # If no references found via DOI, try title search
-            if not references:
-                print(f"⚠️  No references via DOI, trying title search...")
-                related_papers = search_papers_by_title(current_paper['title'], args.scopus_key, 15)
-                references = related_papers
-            
-            print(f"✅ Found {len(references)} potential references")
-            
-            # Filter by keywords if provided
-            if keywords and references:
-                filtered_refs = filter_papers_by_keywords(references, keywords)
-                print(f"🔍 Filtered to {len(filtered_refs)} papers matching keywords: {', '.join(keywords)}")
-                references = filtered_refs
-            
-            # Add references to processing queue
-            refs_added = 0
-            for ref in references:
-                ref_doi = ref['doi']
-                ref_title = ref['title']
-                
-                # Skip if already processed or in queue
-                if ref_doi not in processed_dois and not any(p['doi'] == ref_doi for p in papers_to_process):
-                    # Get reference text
-                    ref_text = get_paper_text_from_scopus(ref_doi, args.scopus_key)
-                    if ref_text:
-                        papers_to_process.append({
-                            'doi': ref_doi,
-                            'title': ref_title,
-                            'text': ref_text,
-                            'distance': current_distance + 1
-                        })
-                        refs_added += 1
-                        print(f"📚 Added to queue (distance {current_distance + 1}): {ref_title[:50]}...")
-                        
-                        # Stop adding if we have enough papers queued
-                        if len(papers_to_process) + papers_processed >= args.max_papers:
-                            break
-                    else:
-                        print(f"⚠️  No text available for: {ref_title[:50]}...")
-            
-            print(f"✅ Added {refs_added} new references to queue")
-        
-        # Rate limiting
-        if papers_processed < args.max_papers and papers_to_process:
-            print(f"⏳ Waiting 3 seconds before next paper...")
-            time.sleep(3)
-    
-    # Save results
-    if all_species_data:
-        df = pd.DataFrame(all_species_data)
-        
-        # Ensure column order
-        columns = ['doi', 'species', 'abundance_or_biomass', 'number', 'location', 'distance_from_seed', 'title']
-        for col in columns:
-            if col not in df.columns:
-                df[col] = "UNSPECIFIED"
-        
-        df = df[columns]
-        df.to_csv(args.output, index=False, quoting=csv.QUOTE_ALL, encoding='utf-8')
-        
-        print(f"✅ Saved {len(df)} species entries to {args.output}")
-        print(f"📊 Unique species: {df['species'].nunique()}")
-        
-        # Show distance breakdown
-        distance_counts = df['distance_from_seed'].value_counts().sort_index()
-        for dist, count in distance_counts.items():
-            print(f"  Distance {dist}: {count} entries")
-            
+    }
+
+    # Process papers concurrently (seed + references), streaming rows to
+    # the CSV as each Claude batch completes so long crawls hold no rows
+    # in memory and a crash keeps everything written so far
+    with open(args.output, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=OUTPUT_COLUMNS, quoting=csv.QUOTE_ALL)
+        writer.writeheader()
+        rows_written, papers_processed = asyncio.run(run_pipeline(seed_paper, args, keywords, writer, csv_file))
+
+    if rows_written:
+        print(f"✅ Saved {rows_written} species entries to {args.output}")
+
+        if args.stats:
+            df = pd.read_csv(args.output)
+            print(f"📊 Unique species: {df['species'].nunique()}")
+
+            # Show distance breakdown
+            distance_counts = df['distance_from_seed'].value_counts().sort_index()
+            for dist, count in distance_counts.items():
+                print(f"  Distance {dist}: {count} entries")
+
         print(f"📊 Total papers processed: {papers_processed}")
     else:
         print("⚠️  No species data extracted")